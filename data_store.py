@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+from functools import lru_cache
 from pathlib import Path
 import numpy as np
 import pandas as pd
 import re
 
 
+_SLUG_RE = re.compile(r"[^a-zA-Z0-9]+")
+
+
 def load_paintings(csv_path: str) -> pd.DataFrame:
     df = pd.read_csv(csv_path)
     df.columns = df.columns.str.strip()
@@ -25,22 +29,9 @@ def guess_title_column(df: pd.DataFrame) -> str:
 
 
 def _to_jsonable(v: Any) -> Any:
-    if v is None:
-        return None
-    # pandas missing values
-    try:
-        if pd.isna(v):
-            return None
-    except Exception:
-        pass
-
     # numpy -> python
-    if isinstance(v, np.integer):
-        return int(v)
-    if isinstance(v, np.floating):
-        return float(v)
-    if isinstance(v, np.bool_):
-        return bool(v)
+    if isinstance(v, np.generic):
+        return v.item()
 
     # pandas Timestamp -> string
     if isinstance(v, pd.Timestamp):
@@ -56,33 +47,43 @@ def _to_jsonable(v: Any) -> Any:
 
 def row_to_meta(row: pd.Series) -> Dict[str, Any]:
     meta: Dict[str, Any] = {}
-    for k in row.index:
-        v2 = _to_jsonable(row[k])
-        if v2 is not None and v2 != "":
+    for k, v in row.dropna().items():
+        v2 = _to_jsonable(v)
+        if v2 != "":
             meta[str(k)] = v2
     return meta
 
 
+def build_title_index(df: pd.DataFrame, title_col: str) -> Dict[str, int]:
+    titles = pd.Series(df[title_col].to_numpy().astype(str)).str.strip()
+    first = titles[~titles.duplicated()]
+    return dict(zip(first.tolist(), first.index.tolist()))
+
+
 def get_two_paintings_by_title(
     df: pd.DataFrame,
     title_col: str,
     a_title: str,
     b_title: str,
+    title_index: Optional[Dict[str, int]] = None,
 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    a_row = df[df[title_col].astype(str) == str(a_title)].iloc[0]
-    b_row = df[df[title_col].astype(str) == str(b_title)].iloc[0]
+    # Pass a title_index from build_title_index to reuse it across calls
+    if title_index is None:
+        title_index = build_title_index(df, title_col)
+    a_row = df.iloc[title_index[str(a_title).strip()]]
+    b_row = df.iloc[title_index[str(b_title).strip()]]
     return row_to_meta(a_row), row_to_meta(b_row)
 
 
 def list_titles(df: pd.DataFrame, title_col: str) -> List[str]:
-    titles = df[title_col].dropna()
-    titles = titles.astype(str).str.strip()
-    filtered = [title for title in titles.tolist() if title and title.lower() not in {"nan", "none"}]
-    return list(dict.fromkeys(filtered))
+    titles = df[title_col].dropna().astype(str).str.strip()
+    titles = titles[titles.ne("") & ~titles.str.lower().isin(["nan", "none"])]
+    return titles.drop_duplicates().tolist()
 
 
+@lru_cache(maxsize=4096)
 def _slugify_title(title: str) -> str:
-    slug = re.sub(r"[^a-zA-Z0-9]+", "-", title.strip().lower()).strip("-")
+    slug = _SLUG_RE.sub("-", title.strip().lower()).strip("-")
     return slug or "unknown"
 
 
@@ -99,16 +100,18 @@ def _build_image_index(image_root: str) -> Dict[str, str]:
     return index
 
 
-def build_painting_options(df: pd.DataFrame, title_col: str, image_root: str) -> List[Dict[str, str]]:
+def build_painting_options(df: pd.DataFrame, title_col: str, image_root: str) -> List[Dict[str, Any]]:
     image_index = _build_image_index(image_root)
-    options: List[Dict[str, str]] = []
+    options: List[Dict[str, Any]] = []
     for title in list_titles(df, title_col):
         slug = _slugify_title(title)
-        image_path = image_index.get(slug, f"{image_root}/{slug}.jpg")
+        image_exists = slug in image_index
+        image_path = image_index[slug] if image_exists else f"{image_root}/{slug}.jpg"
         options.append(
             {
                 "title": title,
                 "image_path": image_path,
+                "image_exists": image_exists,
             }
         )
     return options
\ No newline at end of file
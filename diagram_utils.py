@@ -1,12 +1,78 @@
 from __future__ import annotations
 
-import json
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Pattern, Set, Tuple
 
 from pydantic import BaseModel, Field, ValidationError
 
 
+_ARTWORK_IDS = frozenset(("artworkA", "artworkB"))
+_VALID_NODE_TYPES = frozenset(
+    (
+        "artwork",
+        "niche_connection",
+        "artist",
+        "teacher",
+        "movement",
+        "theme",
+        "context",
+        "other",
+    )
+)
+_VALID_EDGE_KINDS = frozenset(("direct", "contextual", "interpretive"))
+_NO_CONNECTIONS = frozenset()
+_MAX_DIAGRAM_TEXT = 512 * 1024
+
+_CODE_FENCE_OPEN_RE = re.compile(r"^```[a-zA-Z]*\n")
+_JSON_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]')
+_NAME_RE = re.compile(r"[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+")
+_TEACHER_RES = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"studied under ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
+        r"education under ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
+        r"taught by ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
+    )
+)
+_INFLUENCE_SPLIT_RE = re.compile(r",| and ")
+_LOCATION_RE = re.compile(r"along the ([A-Z][A-Za-z\s-]+)")
+_SUBJECT_KEYWORDS = (
+    "landscape",
+    "portrait",
+    "ballet",
+    "dancers",
+    "river",
+    "road",
+    "bridge",
+    "garden",
+    "trees",
+    "seashore",
+    "greenery",
+    "leisure",
+    "genre",
+    "scene",
+)
+_SUBJECT_RE = re.compile("|".join(re.escape(term) for term in _SUBJECT_KEYWORDS))
+
+
+class _IdSlugTable(dict):
+    # Non-alphanumeric (and non-ASCII) characters map to "_"
+    def __missing__(self, codepoint: int) -> str:
+        self[codepoint] = "_"
+        return "_"
+
+
+_ID_SLUG_TABLE = _IdSlugTable(
+    (codepoint, chr(codepoint) if chr(codepoint).isalnum() else "_")
+    for codepoint in range(128)
+)
+
+
+_EdgeRow = Tuple[str, str, str, str, Optional[str]]
+
+
 class DiagramNode(BaseModel):
     id: str
     type: str
@@ -35,21 +101,49 @@ class DiagramPayload(BaseModel):
     layout: DiagramLayout = Field(default_factory=DiagramLayout)
 
 
+@lru_cache(maxsize=128)
+def _influence_patterns(artist_name: str) -> Tuple[Pattern[str], ...]:
+    escaped = re.escape(artist_name)
+    return (
+        re.compile(rf"{escaped}[^.]*influenced by ([^.]+)", re.IGNORECASE),
+        re.compile(rf"{escaped}[^.]*drew inspiration from ([^.]+)", re.IGNORECASE),
+    )
+
+
+def _set_fields(model: BaseModel, **values: Any) -> None:
+    # Bypasses validation; only for values already known to match the field types
+    for name, value in values.items():
+        object.__setattr__(model, name, value)
+
+
 def _strip_code_fences(text: str) -> str:
     stripped = text.strip()
-    if stripped.startswith("```"):
-        stripped = re.sub(r"^```[a-zA-Z]*\n", "", stripped)
-        stripped = re.sub(r"\n```$", "", stripped)
+    if not stripped.startswith("```"):
+        return stripped
+    stripped = _CODE_FENCE_OPEN_RE.sub("", stripped)
+    if stripped.endswith("\n```"):
+        stripped = stripped[: -len("\n```")]
     return stripped.strip()
 
 
 def _extract_json(text: str) -> str:
-    cleaned = _strip_code_fences(text)
-    first = cleaned.find("{")
-    last = cleaned.rfind("}")
-    if first == -1 or last == -1 or last <= first:
-        return cleaned
-    return cleaned[first : last + 1]
+    first = text.find("{")
+    if first == -1:
+        return _strip_code_fences(text)
+    # Only braces outside string literals count toward depth
+    depth = 0
+    for match in _JSON_TOKEN_RE.finditer(text, first):
+        token = match.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth == 0:
+                return text[first : match.end()]
+    last = text.rfind("}")
+    if last <= first:
+        return _strip_code_fences(text)
+    return text[first : last + 1]
 
 
 def parse_diagram_payload(
@@ -59,17 +153,25 @@ def parse_diagram_payload(
     artist_b: Optional[str] = None,
     movement: Optional[str] = None,
 ) -> DiagramPayload:
+    if len(raw_text) > _MAX_DIAGRAM_TEXT:
+        raise ValueError("Diagram output is too large.")
     candidate = _extract_json(raw_text)
-    payload = json.loads(candidate)
-    diagram = DiagramPayload.model_validate(payload)
-    diagram = normalize_diagram(
+    diagram = DiagramPayload.model_validate_json(candidate)
+    diagram, adjacency = _normalize_diagram(
         diagram, artist_a=artist_a, artist_b=artist_b, movement=movement
     )
-    validate_diagram_payload(diagram)
+    _validate_diagram_payload(diagram, adjacency)
     return diagram
 
 
 def validate_diagram_payload(diagram: DiagramPayload) -> None:
+    _validate_diagram_payload(diagram, None)
+
+
+def _validate_diagram_payload(
+    diagram: DiagramPayload, connections: Optional[Dict[str, Set[str]]]
+) -> None:
+    # connections must be built from this exact diagram, or None to build it here
     node_ids = [node.id for node in diagram.nodes]
     if len(node_ids) != len(set(node_ids)):
         raise ValueError("Diagram node ids must be unique.")
@@ -83,19 +185,10 @@ def validate_diagram_payload(diagram: DiagramPayload) -> None:
             raise ValueError("Diagram node labels must be non-empty.")
         if node.level < 0 or node.level > 4:
             raise ValueError("Diagram node level must be between 0 and 4.")
-        if node.type not in {
-            "artwork",
-            "niche_connection",
-            "artist",
-            "teacher",
-            "movement",
-            "theme",
-            "context",
-            "other",
-        }:
+        if node.type not in _VALID_NODE_TYPES:
             raise ValueError("Diagram node type is invalid.")
 
-        if node.id in {"artworkA", "artworkB"}:
+        if node.id in _ARTWORK_IDS:
             if node.type != "artwork":
                 raise ValueError("Artwork nodes must have type 'artwork'.")
             if node.level != 0:
@@ -104,21 +197,24 @@ def validate_diagram_payload(diagram: DiagramPayload) -> None:
             if node.level == 0:
                 raise ValueError("Non-artwork nodes must have level 1-4.")
 
+    build_connections = connections is None
+    if build_connections:
+        connections = {node_id: set() for node_id in node_id_set}
     for edge in diagram.edges:
-        if edge.source not in node_id_set or edge.target not in node_id_set:
+        source = edge.source
+        target = edge.target
+        if source not in node_id_set or target not in node_id_set:
             raise ValueError("Diagram edge references unknown nodes.")
-        if edge.kind not in {"direct", "contextual", "interpretive"}:
+        if edge.kind not in _VALID_EDGE_KINDS:
             raise ValueError("Diagram edge kind is invalid.")
-
-    connections = {node_id: set() for node_id in node_id_set}
-    for edge in diagram.edges:
-        connections[edge.source].add(edge.target)
-        connections[edge.target].add(edge.source)
+        if build_connections:
+            connections[source].add(target)
+            connections[target].add(source)
 
     for node in diagram.nodes:
-        if node.id in {"artworkA", "artworkB"}:
+        if node.id in _ARTWORK_IDS:
             continue
-        connected = connections.get(node.id, set())
+        connected = connections.get(node.id, _NO_CONNECTIONS)
         if not connected:
             raise ValueError("Each non-artwork node must connect to at least one node.")
         if node.type == "niche_connection" or node.level == 1:
@@ -133,53 +229,73 @@ def normalize_diagram(
     artist_b: Optional[str] = None,
     movement: Optional[str] = None,
 ) -> DiagramPayload:
+    normalized, _ = _normalize_diagram(
+        diagram, artist_a=artist_a, artist_b=artist_b, movement=movement
+    )
+    return normalized
+
+
+def _normalize_diagram(
+    diagram: DiagramPayload,
+    *,
+    artist_a: Optional[str] = None,
+    artist_b: Optional[str] = None,
+    movement: Optional[str] = None,
+) -> Tuple[DiagramPayload, Dict[str, Set[str]]]:
     nodes = list(diagram.nodes)
     edges = list(diagram.edges)
-    def degree(node_id: str) -> int:
-        count = 0
-        for edge in edges:
-            if edge.source == node_id or edge.target == node_id:
-                count += 1
-        return count
-
-    non_artwork_nodes = [
-        node for node in nodes if node.id not in {"artworkA", "artworkB"}
-    ]
+    degree: Counter[str] = Counter()
+    adjacency: Dict[str, Set[str]] = defaultdict(set)
+    existing_edge_ids: Set[str] = set()
+    for edge in edges:
+        degree[edge.source] += 1
+        # A self-loop counts once toward its node's degree
+        if edge.target != edge.source:
+            degree[edge.target] += 1
+        adjacency[edge.source].add(edge.target)
+        adjacency[edge.target].add(edge.source)
+        existing_edge_ids.add(edge.id)
+
+    non_artwork_nodes: List[DiagramNode] = []
+    level_one_nodes: List[DiagramNode] = []
+    # Parallel to nodes; kept in sync on every append below
+    labels_lower: List[str] = []
+    for node in nodes:
+        labels_lower.append(node.label.lower())
+        if node.id in _ARTWORK_IDS:
+            continue
+        non_artwork_nodes.append(node)
+        if node.level == 1 and node.type == "niche_connection":
+            level_one_nodes.append(node)
 
-    level_one_nodes = [
-        node for node in non_artwork_nodes if node.level == 1 and node.type == "niche_connection"
-    ]
     if len(level_one_nodes) > 1:
-        level_one_nodes.sort(key=lambda node: degree(node.id), reverse=True)
+        level_one_nodes.sort(key=lambda node: degree[node.id], reverse=True)
         primary = level_one_nodes[0]
         for node in level_one_nodes[1:]:
-            node.level = max(node.level, 2)
+            _set_fields(node, level=max(node.level, 2))
             if node.type == "niche_connection":
-                node.type = "theme"
+                _set_fields(node, type="theme")
     elif len(level_one_nodes) == 0:
         if non_artwork_nodes:
-            non_artwork_nodes.sort(key=lambda node: degree(node.id), reverse=True)
+            non_artwork_nodes.sort(key=lambda node: degree[node.id], reverse=True)
             primary = non_artwork_nodes[0]
-            primary.level = 1
-            primary.type = "niche_connection"
+            _set_fields(primary, level=1, type="niche_connection")
         else:
-            nodes.append(
-                DiagramNode(
-                    id="L1",
-                    type="niche_connection",
-                    label="Connection could not be structured",
-                    level=1,
-                )
+            placeholder = DiagramNode.model_construct(
+                id="L1",
+                type="niche_connection",
+                label="Connection could not be structured",
+                level=1,
             )
-
-    existing_edge_ids = {edge.id for edge in edges}
+            nodes.append(placeholder)
+            labels_lower.append(placeholder.label.lower())
 
     def add_edge(source: str, target: str, kind: str) -> None:
         edge_id = f"edge-{source}-{target}"
         if edge_id in existing_edge_ids:
             return
         edges.append(
-            DiagramEdge(
+            DiagramEdge.model_construct(
                 id=edge_id,
                 source=source,
                 target=target,
@@ -187,25 +303,24 @@ def normalize_diagram(
             )
         )
         existing_edge_ids.add(edge_id)
+        adjacency[source].add(target)
+        adjacency[target].add(source)
+
+    artist_a_lower = (artist_a or "").lower()
+    artist_b_lower = (artist_b or "").lower()
+    movement_lower = (movement or "").lower()
 
-    def label_matches(label: str, target: Optional[str]) -> bool:
-        if not label or not target:
+    def label_matches(label_lower: str, target_lower: str) -> bool:
+        if not label_lower or not target_lower:
             return False
-        return target.lower() in label.lower()
+        return target_lower in label_lower
 
-    for node in nodes:
-        if node.id in {"artworkA", "artworkB"}:
+    for node, label_lower in zip(nodes, labels_lower):
+        if node.id in _ARTWORK_IDS:
             continue
-        has_to_a = any(
-            (edge.source == "artworkA" and edge.target == node.id)
-            or (edge.source == node.id and edge.target == "artworkA")
-            for edge in edges
-        )
-        has_to_b = any(
-            (edge.source == "artworkB" and edge.target == node.id)
-            or (edge.source == node.id and edge.target == "artworkB")
-            for edge in edges
-        )
+        neighbours = adjacency[node.id]
+        has_to_a = "artworkA" in neighbours
+        has_to_b = "artworkB" in neighbours
         if node.type == "niche_connection" or node.level == 1:
             if not has_to_a:
                 add_edge("artworkA", node.id, "direct")
@@ -213,9 +328,9 @@ def normalize_diagram(
                 add_edge("artworkB", node.id, "direct")
             continue
         if node.type == "artist":
-            if not has_to_a and label_matches(node.label, artist_a):
+            if not has_to_a and label_matches(label_lower, artist_a_lower):
                 add_edge("artworkA", node.id, "contextual")
-            if not has_to_b and label_matches(node.label, artist_b):
+            if not has_to_b and label_matches(label_lower, artist_b_lower):
                 add_edge("artworkB", node.id, "contextual")
             if not has_to_a and not has_to_b:
                 add_edge("artworkA", node.id, "contextual")
@@ -226,45 +341,51 @@ def normalize_diagram(
             if not has_to_b:
                 add_edge("artworkB", node.id, "contextual")
 
-    def ensure_artist_node(artist_label: Optional[str], node_id: str, artwork_id: str) -> None:
+    artist_labels_lower: List[str] = []
+    has_movement = False
+    for node, label_lower in zip(nodes, labels_lower):
+        if node.type == "artist":
+            artist_labels_lower.append(label_lower)
+        elif node.type == "movement" and movement_lower in label_lower:
+            has_movement = True
+
+    def ensure_artist_node(
+        artist_label: Optional[str], artist_lower: str, node_id: str, artwork_id: str
+    ) -> None:
         if not artist_label:
             return
-        if any(
-            node.type == "artist" and artist_label.lower() in node.label.lower()
-            for node in nodes
-        ):
+        if any(artist_lower in label_lower for label_lower in artist_labels_lower):
             return
         nodes.append(
-            DiagramNode(
+            DiagramNode.model_construct(
                 id=node_id,
                 type="artist",
                 label=artist_label,
                 level=2,
             )
         )
+        labels_lower.append(artist_lower)
+        artist_labels_lower.append(artist_lower)
         add_edge(artwork_id, node_id, "contextual")
 
-    ensure_artist_node(artist_a, "artistA", "artworkA")
-    ensure_artist_node(artist_b, "artistB", "artworkB")
+    ensure_artist_node(artist_a, artist_a_lower, "artistA", "artworkA")
+    ensure_artist_node(artist_b, artist_b_lower, "artistB", "artworkB")
 
-    if movement:
-        has_movement = any(
-            node.type == "movement" and movement.lower() in node.label.lower()
-            for node in nodes
-        )
-        if not has_movement:
-            nodes.append(
-                DiagramNode(
-                    id="movement",
-                    type="movement",
-                    label=movement,
-                    level=4,
-                )
+    if movement and not has_movement:
+        nodes.append(
+            DiagramNode.model_construct(
+                id="movement",
+                type="movement",
+                label=movement,
+                level=4,
             )
-            add_edge("artworkA", "movement", "contextual")
-            add_edge("artworkB", "movement", "contextual")
+        )
+        labels_lower.append(movement_lower)
+        add_edge("artworkA", "movement", "contextual")
+        add_edge("artworkB", "movement", "contextual")
 
-    return DiagramPayload(nodes=nodes, edges=edges, layout=diagram.layout)
+    normalized = DiagramPayload.model_construct(nodes=nodes, edges=edges, layout=diagram.layout)
+    return normalized, adjacency
 
 
 def build_fallback_diagram(
@@ -345,16 +466,13 @@ def build_deterministic_diagram(
         return (value or "").strip()
 
     def extract_names(text: str) -> List[str]:
-        return re.findall(r"[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+", text)
+        if not text or text.islower():
+            return []
+        return _NAME_RE.findall(text)
 
     def extract_teacher(text: str) -> Optional[str]:
-        patterns = [
-            r"studied under ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
-            r"education under ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
-            r"taught by ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _TEACHER_RES:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         return None
@@ -362,16 +480,12 @@ def build_deterministic_diagram(
     def extract_influences(artist_name: str, text: str) -> List[str]:
         if not artist_name:
             return []
-        patterns = [
-            rf"{re.escape(artist_name)}[^.]*influenced by ([^.]+)",
-            rf"{re.escape(artist_name)}[^.]*drew inspiration from ([^.]+)",
-        ]
         influences: List[str] = []
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _influence_patterns(artist_name):
+            match = pattern.search(text)
             if match:
                 chunk = match.group(1)
-                parts = re.split(r",| and ", chunk)
+                parts = _INFLUENCE_SPLIT_RE.split(chunk)
                 for part in parts:
                     candidate = part.strip()
                     if candidate:
@@ -380,9 +494,13 @@ def build_deterministic_diagram(
 
 
     def intersection_name(a: str, b: str) -> Optional[str]:
-        names_a = set(extract_names(a))
+        names_a = extract_names(a)
+        if not names_a:
+            return None
         names_b = set(extract_names(b))
-        shared = [name for name in names_a.intersection(names_b)]
+        if not names_b:
+            return None
+        shared = [name for name in dict.fromkeys(names_a) if name in names_b]
         for name in shared:
             if name.lower() in summary_lower:
                 return name
@@ -404,24 +522,13 @@ def build_deterministic_diagram(
             ]
         ).lower()
 
-        keywords = [
-            "landscape",
-            "portrait",
-            "ballet",
-            "dancers",
-            "river",
-            "road",
-            "bridge",
-            "garden",
-            "trees",
-            "seashore",
-            "greenery",
-            "leisure",
-            "genre",
-            "scene",
-        ]
-        for term in keywords:
-            if term in summary_lower and term in left_text and term in right_text:
+        shared = (
+            set(_SUBJECT_RE.findall(summary_lower))
+            & set(_SUBJECT_RE.findall(left_text))
+            & set(_SUBJECT_RE.findall(right_text))
+        )
+        for term in _SUBJECT_KEYWORDS:
+            if term in shared:
                 return term
         return None
 
@@ -441,7 +548,7 @@ def build_deterministic_diagram(
     if location_a and location_b and location_a.lower() == location_b.lower():
         shared_location = location_a
     if not shared_location:
-        location_match = re.search(r"along the ([A-Z][A-Za-z\s-]+)", summary_body)
+        location_match = _LOCATION_RE.search(summary_body)
         if location_match and "both" in summary_lower:
             shared_location = location_match.group(1).strip()
 
@@ -472,15 +579,17 @@ def build_deterministic_diagram(
         l1_source = "fallback"
 
     nodes: List[DiagramNode] = []
-    edges: List[DiagramEdge] = []
+    edge_rows: List[_EdgeRow] = []
+    existing_edge_ids: Set[str] = set()
 
     def add_edge(source: str, target: str, kind: str = "contextual") -> None:
         edge_id = f"edge-{source}-{target}"
         suffix = 1
-        while any(edge.id == edge_id for edge in edges):
+        while edge_id in existing_edge_ids:
             suffix += 1
             edge_id = f"edge-{source}-{target}-{suffix}"
-        edges.append(DiagramEdge(id=edge_id, source=source, target=target, kind=kind))
+        existing_edge_ids.add(edge_id)
+        edge_rows.append((edge_id, source, target, kind, None))
 
     def add_labeled_edge(
         source: str,
@@ -490,12 +599,11 @@ def build_deterministic_diagram(
     ) -> None:
         edge_id = f"edge-{source}-{target}"
         suffix = 1
-        while any(edge.id == edge_id for edge in edges):
+        while edge_id in existing_edge_ids:
             suffix += 1
             edge_id = f"edge-{source}-{target}-{suffix}"
-        edges.append(
-            DiagramEdge(id=edge_id, source=source, target=target, kind=kind, label=label)
-        )
+        existing_edge_ids.add(edge_id)
+        edge_rows.append((edge_id, source, target, kind, label))
 
     # Layout constants
     canvas_width = 920
@@ -517,34 +625,34 @@ def build_deterministic_diagram(
     year_b = artwork_b.get("year")
 
     nodes.append(
-        DiagramNode(
+        DiagramNode.model_construct(
             id="artworkA",
             type="artwork",
             label=f"Artwork A — {title_a}, {artist_a_label}, {year_a}",
             level=0,
-            x=left_x,
-            y=top_row_y,
+            x=float(left_x),
+            y=float(top_row_y),
         )
     )
     nodes.append(
-        DiagramNode(
+        DiagramNode.model_construct(
             id="artworkB",
             type="artwork",
             label=f"Artwork B — {title_b}, {artist_b_label}, {year_b}",
             level=0,
-            x=right_x,
-            y=top_row_y,
+            x=float(right_x),
+            y=float(top_row_y),
         )
     )
 
     nodes.append(
-        DiagramNode(
+        DiagramNode.model_construct(
             id="L1",
             type="niche_connection",
             label=l1_label,
             level=1,
             x=center_x,
-            y=top_row_y,
+            y=float(top_row_y),
         )
     )
     add_edge("artworkA", "L1", "direct")
@@ -552,23 +660,23 @@ def build_deterministic_diagram(
 
     # Artist nodes
     nodes.append(
-        DiagramNode(
+        DiagramNode.model_construct(
             id="artistA",
             type="artist",
             label=artist_a_label,
             level=2,
-            x=left_x,
-            y=top_row_y + row_spacing,
+            x=float(left_x),
+            y=float(top_row_y + row_spacing),
         )
     )
     nodes.append(
-        DiagramNode(
+        DiagramNode.model_construct(
             id="artistB",
             type="artist",
             label=artist_b_label,
             level=2,
-            x=right_x,
-            y=top_row_y + row_spacing,
+            x=float(right_x),
+            y=float(top_row_y + row_spacing),
         )
     )
     add_labeled_edge("artworkA", "artistA", "Created by", "contextual")
@@ -580,7 +688,7 @@ def build_deterministic_diagram(
 
     if subject_term and l1_source != "subject":
         theme_nodes.append(
-            DiagramNode(
+            DiagramNode.model_construct(
                 id="L2",
                 type="theme",
                 label=f"Shared {subject_term} focus",
@@ -590,7 +698,7 @@ def build_deterministic_diagram(
 
     if teacher:
         level3_nodes.append(
-            DiagramNode(
+            DiagramNode.model_construct(
                 id="teacher",
                 type="teacher",
                 label=teacher,
@@ -603,20 +711,26 @@ def build_deterministic_diagram(
     influence_lookup: Dict[str, DiagramNode] = {}
 
     def normalize_id(text: str) -> str:
-        slug = re.sub(r"[^a-zA-Z0-9]+", "_", text.strip().lower())
+        slug = text.strip().lower().translate(_ID_SLUG_TABLE)
+        while "__" in slug:
+            slug = slug.replace("__", "_")
         return slug.strip("_") or "influence"
 
+    seen_lower = {artist_a_label.lower(), artist_b_label.lower()}
     for name in influences_a + influences_b:
-        if name.lower() in {artist_a_label.lower(), artist_b_label.lower()}:
+        name_lower = name.lower()
+        if name_lower in seen_lower:
             continue
+        seen_lower.add(name_lower)
         node_id = f"influence_{normalize_id(name)}"
-        if node_id not in influence_lookup:
-            influence_lookup[node_id] = DiagramNode(
-                id=node_id,
-                type="artist",
-                label=name,
-                level=2,
-            )
+        if node_id in influence_lookup:
+            continue
+        influence_lookup[node_id] = DiagramNode.model_construct(
+            id=node_id,
+            type="artist",
+            label=name,
+            level=2,
+        )
 
     influence_nodes.extend(influence_lookup.values())
 
@@ -666,13 +780,13 @@ def build_deterministic_diagram(
     if movement and (l1_source != "movement"):
         movement_row_index = max(row_index, 3)
         nodes.append(
-            DiagramNode(
+            DiagramNode.model_construct(
                 id="movement",
                 type="movement",
                 label=movement,
                 level=4,
                 x=center_x,
-                y=top_row_y + row_spacing * movement_row_index,
+                y=float(top_row_y + row_spacing * movement_row_index),
             )
         )
         add_labeled_edge(
@@ -688,6 +802,14 @@ def build_deterministic_diagram(
             "contextual",
         )
 
-    diagram = DiagramPayload(nodes=nodes, edges=edges, layout=DiagramLayout(direction="TB"))
+    edges = [
+        DiagramEdge.model_construct(
+            id=edge_id, source=source, target=target, kind=kind, label=label
+        )
+        for edge_id, source, target, kind, label in edge_rows
+    ]
+    diagram = DiagramPayload.model_construct(
+        nodes=nodes, edges=edges, layout=DiagramLayout.model_construct(direction="TB")
+    )
     validate_diagram_payload(diagram)
     return diagram
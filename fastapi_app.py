@@ -1,15 +1,19 @@
+import asyncio
 import csv
 import hashlib
-import json
 import logging
 import os
+import sys
 import threading
 import uuid
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+import orjson
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, ValidationError
@@ -23,9 +27,9 @@ from diagram_utils import (
 )
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI
 except ImportError:  # pragma: no cover - optional for local runs without OpenAI
-    OpenAI = None
+    AsyncOpenAI = None
 
 
 DATASET_VERSION = "2026-02-19_v10"
@@ -34,12 +38,15 @@ DATASET_FILE = "Painting_Metadata_260127.csv"
 PAINTINGS_DIR = Path("frontend/assets/paintings")
 CACHE_DIR = Path("cache")
 ALLOWED_SETS = {"A", "B"}
+OPENAI_CONCURRENCY = int(os.getenv("ARTWEAVE_OPENAI_CONCURRENCY", "4"))
+if OPENAI_CONCURRENCY < 1:
+    raise RuntimeError("ARTWEAVE_OPENAI_CONCURRENCY must be at least 1.")
 
 logger = logging.getLogger("artweave")
 logging.basicConfig(level=logging.INFO)
 
 
-@dataclass
+@dataclass(slots=True)
 class Painting:
     id: str
     title: str
@@ -48,6 +55,16 @@ class Painting:
     image_filename: str
     set_name: str
     metadata: Dict[str, Any]
+    formatted_metadata: str
+    diagram_facts: Dict[str, Any] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.diagram_facts = {
+            "title": self.title,
+            "artist": self.artist,
+            "year": self.year,
+            **self.metadata,
+        }
 
     def as_payload(self) -> Dict[str, Any]:
         return {
@@ -103,12 +120,22 @@ app.mount("/static/paintings", StaticFiles(directory=PAINTINGS_DIR), name="paint
 
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-_paintings_lock = threading.Lock()
-_paintings_by_set: Dict[str, List[Painting]] = {"A": [], "B": []}
+# Both are published at startup by rebinding, so reads need no lock
+_paintings_index: Dict[Tuple[str, str], Painting] = {}
+_paintings_json_by_set: Dict[str, bytes] = {}
 
+# Only inserts take the lock. Each job has one writer, which sets its result
+# fields before status, so lock-free readers never see status ahead of data.
 _jobs_lock = threading.Lock()
 _jobs: Dict[str, CompareJob] = {}
 
+_openai_sem = asyncio.Semaphore(OPENAI_CONCURRENCY)
+
+MEM_CACHE_SIZE = 256
+CachedCompare = Tuple[Optional[str], DiagramPayload]
+_mem_cache_lock = threading.Lock()
+_mem_cache: "OrderedDict[str, CachedCompare]" = OrderedDict()
+
 
 def _load_paintings() -> None:
     dataset_path = Path(DATASET_FILE)
@@ -117,40 +144,48 @@ def _load_paintings() -> None:
 
     with dataset_path.open(newline="", encoding="utf-8") as handle:
         reader = csv.DictReader(handle)
+        fields = [
+            (name, sys.intern(name.strip()))
+            for name in reader.fieldnames or []
+            if name and name.strip()
+        ]
+        key_by_lower = {key.lower(): key for _, key in fields}
+        id_key = key_by_lower.get("id")
+        set_key = key_by_lower.get("set")
+        title_key = key_by_lower.get("title")
+        artist_key = key_by_lower.get("artist")
+        year_key = key_by_lower.get("year")
+        image_key = key_by_lower.get("image_filename")
+
         entries: Dict[str, List[Painting]] = {"A": [], "B": []}
         for row in reader:
             normalized_row: Dict[str, Any] = {}
-            normalized_lower: Dict[str, Any] = {}
-            for key, value in row.items():
-                cleaned_key = (key or "").strip()
-                if not cleaned_key:
+            for name, key in fields:
+                value = row[name]
+                if value is None:
+                    continue
+                value = value.strip()
+                if value == "":
                     continue
-                if isinstance(value, str):
-                    cleaned_value = value.strip()
-                    if cleaned_value == "":
-                        continue
-                    normalized_row[cleaned_key] = cleaned_value
-                    normalized_lower[cleaned_key.lower()] = cleaned_value
-                elif value is not None:
-                    normalized_row[cleaned_key] = value
-                    normalized_lower[cleaned_key.lower()] = value
-
-            set_name = (normalized_lower.get("set") or "").strip()
+                normalized_row[key] = value
+
+            set_name = normalized_row.get(set_key) or ""
             if set_name not in ALLOWED_SETS:
                 continue
-            year_value = normalized_lower.get("year") or "0"
+            year_value = normalized_row.get(year_key) or "0"
             try:
                 year = int(year_value)
             except ValueError:
                 year = 0
             painting = Painting(
-                id=(normalized_lower.get("id") or "").strip(),
-                title=(normalized_lower.get("title") or "").strip(),
-                artist=(normalized_lower.get("artist") or "").strip(),
+                id=normalized_row.get(id_key) or "",
+                title=normalized_row.get(title_key) or "",
+                artist=normalized_row.get(artist_key) or "",
                 year=year,
-                image_filename=(normalized_lower.get("image_filename") or "").strip(),
+                image_filename=normalized_row.get(image_key) or "",
                 set_name=set_name,
                 metadata=normalized_row,
+                formatted_metadata=_format_metadata(normalized_row),
             )
             if painting.id:
                 entries[set_name].append(painting)
@@ -161,45 +196,99 @@ def _load_paintings() -> None:
                 f"Set {set_name} must contain exactly 5 paintings (found {len(paintings)})"
             )
 
-    with _paintings_lock:
-        _paintings_by_set.update(entries)
+    index: Dict[Tuple[str, str], Painting] = {}
+    for set_name, paintings in entries.items():
+        for painting in paintings:
+            index.setdefault((set_name, painting.id), painting)
+
+    paintings_json = {
+        set_name: orjson.dumps([painting.as_payload() for painting in paintings])
+        for set_name, paintings in entries.items()
+    }
+
+    global _paintings_index, _paintings_json_by_set
+    _paintings_index = index
+    _paintings_json_by_set = paintings_json
 
 
 def _get_painting_by_id(set_name: str, painting_id: str) -> Painting:
-    with _paintings_lock:
-        for painting in _paintings_by_set.get(set_name, []):
-            if painting.id == painting_id:
-                return painting
-    raise HTTPException(status_code=404, detail="Painting not found in selected set.")
+    painting = _paintings_index.get((set_name, painting_id))
+    if painting is None:
+        raise HTTPException(status_code=404, detail="Painting not found in selected set.")
+    return painting
+
+
+def _cache_key(set_name: str, id_lo: str, id_hi: str) -> str:
+    payload = f"{DATASET_VERSION}|{set_name}|{id_lo}|{id_hi}"
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+    return f"{set_name}__{id_lo}__{id_hi}__{digest}.json"
+
 
+def _mem_cache_get(cache_name: str) -> Optional[CachedCompare]:
+    with _mem_cache_lock:
+        cached = _mem_cache.get(cache_name)
+        if cached is not None:
+            _mem_cache.move_to_end(cache_name)
+        return cached
 
-def _cache_key(set_name: str, left_id: str, right_id: str) -> str:
-    ids = sorted([left_id, right_id])
-    payload = f"{DATASET_VERSION}|{set_name}|{ids[0]}|{ids[1]}"
-    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
-    safe_ids = "__".join(ids)
-    return f"{set_name}__{safe_ids}__{digest}.json"
+
+def _mem_cache_put(cache_name: str, cached: CachedCompare) -> None:
+    with _mem_cache_lock:
+        _mem_cache[cache_name] = cached
+        _mem_cache.move_to_end(cache_name)
+        if len(_mem_cache) > MEM_CACHE_SIZE:
+            _mem_cache.popitem(last=False)
 
 
 def _read_cache(cache_path: Path) -> Optional[Dict[str, Any]]:
     if not cache_path.exists():
         return None
-    with cache_path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    return orjson.loads(cache_path.read_bytes())
 
 
 def _write_cache(cache_path: Path, payload: Dict[str, Any]) -> None:
-    with cache_path.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2)
+    data = orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    # Unique name per write, so concurrent writers never rename a partial file
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with tmp_path.open("xb") as handle:
+            handle.write(data)
+        tmp_path.replace(cache_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
 
+def _load_cached_compare(cache_name: str) -> Optional[CachedCompare]:
+    cached = _mem_cache_get(cache_name)
+    if cached is not None:
+        return cached
 
-def _get_openai_client() -> OpenAI:
+    cached_payload = _read_cache(CACHE_DIR / cache_name)
+    if not cached_payload:
+        return None
+    cached_diagram = cached_payload.get("diagram")
+    if not cached_diagram:
+        return None
+    try:
+        diagram = DiagramPayload.model_validate(cached_diagram)
+    except (ValidationError, ValueError) as exc:
+        logger.warning("Cached diagram invalid, regenerating: %s", exc)
+        return None
+
+    cached = (cached_payload.get("summary_markdown"), diagram)
+    _mem_cache_put(cache_name, cached)
+    return cached
+
+
+@lru_cache(maxsize=1)
+def _get_openai_client() -> AsyncOpenAI:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not configured.")
-    if OpenAI is None:
+    if AsyncOpenAI is None:
         raise HTTPException(status_code=500, detail="OpenAI SDK is not installed.")
-    return OpenAI(api_key=api_key)
+    return AsyncOpenAI(api_key=api_key)
 
 
 def _format_metadata(meta: Dict[str, Any]) -> str:
@@ -229,92 +318,86 @@ def _format_metadata(meta: Dict[str, Any]) -> str:
     return "\n".join(lines) if lines else "No additional metadata."
 
 
-def _generate_summary(client: OpenAI, left: Painting, right: Painting) -> str:
-
-    prompt = (
-        "ArtWeave - Concise Context + Focused Relation\n\n"
-        "Purpose:\n"
-        "ArtWeave analyzes and compares two artworks using the provided dataset. "
-        "It identifies both broad contextual links (e.g., movement, period, or location) "
-        "and specific relational ties (e.g., artist relationship, ownership, or exhibition history).\n\n"
-        "Guidelines:\n"
-        "- Keep the broad context brief and use the specific connection as the central insight.\n"
-        "- All information must be factual and dataset-based — no assumptions or invented context.\n"
-        "- If the dataset lacks a field, acknowledge the absence and use the nearest relevant one "
-        "(e.g., if ownership data is missing, reference exhibition or location link).\n"
-        "- Do NOT repeat placeholders like [title] or [artist]. Always fill with actual values.\n"
-        "- In the Comparison Summary, refer to artworks by their titles (not 'Artwork A/B').\n\n"
-        "Output Format (exact):\n"
-        "**Overview**\n"
-        "- Artwork A: <title>, <artist>, <year>\n"
-        "- Artwork B: <title>, <artist>, <year>\n\n"
-        "**Comparison Summary**\n"
-        "Both artworks <broad context: movement/era/location>. "
-        "<Specific connection highlighting relation or shared circumstance>."
-    )
-    response = client.responses.create(
-        model="gpt-4o-mini",
-        temperature=0.2,
-        input=[
-            {
-                "role": "system",
-                "content": (
-                    "You are ArtWeave, an art historian assistant that only uses the provided "
-                    "dataset fields. Do not invent facts; if a field is missing, say so explicitly. "
-                    "Never output placeholder brackets like [title]."
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Use only the provided fields.\n\n"
-                    f"Artwork A title: {left.title}\n"
-                    f"Artwork A artist: {left.artist}\n"
-                    f"Artwork A year: {left.year}\n"
-                    f"Artwork A metadata:\n{_format_metadata(left.metadata)}\n\n"
-                    f"Artwork B title: {right.title}\n"
-                    f"Artwork B artist: {right.artist}\n"
-                    f"Artwork B year: {right.year}\n"
-                    f"Artwork B metadata:\n{_format_metadata(right.metadata)}\n\n"
-                    f"{prompt}"
-                ),
-            },
-        ],
-    )
+_SUMMARY_PROMPT = (
+    "ArtWeave - Concise Context + Focused Relation\n\n"
+    "Purpose:\n"
+    "ArtWeave analyzes and compares two artworks using the provided dataset. "
+    "It identifies both broad contextual links (e.g., movement, period, or location) "
+    "and specific relational ties (e.g., artist relationship, ownership, or exhibition history).\n\n"
+    "Guidelines:\n"
+    "- Keep the broad context brief and use the specific connection as the central insight.\n"
+    "- All information must be factual and dataset-based — no assumptions or invented context.\n"
+    "- If the dataset lacks a field, acknowledge the absence and use the nearest relevant one "
+    "(e.g., if ownership data is missing, reference exhibition or location link).\n"
+    "- Do NOT repeat placeholders like [title] or [artist]. Always fill with actual values.\n"
+    "- In the Comparison Summary, refer to artworks by their titles (not 'Artwork A/B').\n\n"
+    "Output Format (exact):\n"
+    "**Overview**\n"
+    "- Artwork A: <title>, <artist>, <year>\n"
+    "- Artwork B: <title>, <artist>, <year>\n\n"
+    "**Comparison Summary**\n"
+    "Both artworks <broad context: movement/era/location>. "
+    "<Specific connection highlighting relation or shared circumstance>."
+)
+
+_SUMMARY_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": (
+        "You are ArtWeave, an art historian assistant that only uses the provided "
+        "dataset fields. Do not invent facts; if a field is missing, say so explicitly. "
+        "Never output placeholder brackets like [title]."
+    ),
+}
+
+
+async def _generate_summary(client: AsyncOpenAI, left: Painting, right: Painting) -> str:
+    async with _openai_sem:
+        response = await client.responses.create(
+            model="gpt-4o-mini",
+            temperature=0.2,
+            input=[
+                _SUMMARY_SYSTEM_MESSAGE,
+                {
+                    "role": "user",
+                    "content": (
+                        "Use only the provided fields.\n\n"
+                        f"Artwork A title: {left.title}\n"
+                        f"Artwork A artist: {left.artist}\n"
+                        f"Artwork A year: {left.year}\n"
+                        f"Artwork A metadata:\n{left.formatted_metadata}\n\n"
+                        f"Artwork B title: {right.title}\n"
+                        f"Artwork B artist: {right.artist}\n"
+                        f"Artwork B year: {right.year}\n"
+                        f"Artwork B metadata:\n{right.formatted_metadata}\n\n"
+                        f"{_SUMMARY_PROMPT}"
+                    ),
+                },
+            ],
+        )
     return response.output_text.strip()
 
 
 def _generate_diagram(
-    client: OpenAI, left: Painting, right: Painting, summary_text: str
+    client: AsyncOpenAI, left: Painting, right: Painting, summary_text: str
 ) -> DiagramPayload:
     movement_a = (left.metadata.get("Art Movement") or "").strip()
     movement_b = (right.metadata.get("Art Movement") or "").strip()
+    movement_a_lower = movement_a.lower()
+    movement_b_lower = movement_b.lower()
+    summary_lower = summary_text.lower()
     movement: Optional[str] = None
-    if movement_a and movement_b and movement_a.lower() == movement_b.lower():
+    if movement_a and movement_b and movement_a_lower == movement_b_lower:
         movement = movement_a
-    elif movement_a and movement_a.lower() in summary_text.lower():
+    elif movement_a and movement_a_lower in summary_lower:
         movement = movement_a
-    elif movement_b and movement_b.lower() in summary_text.lower():
+    elif movement_b and movement_b_lower in summary_lower:
         movement = movement_b
 
-    artwork_a = {
-        "title": left.title,
-        "artist": left.artist,
-        "year": left.year,
-        **left.metadata,
-    }
-    artwork_b = {
-        "title": right.title,
-        "artist": right.artist,
-        "year": right.year,
-        **right.metadata,
-    }
-
     try:
         diagram = build_deterministic_diagram(
             summary=summary_text,
-            artwork_a=artwork_a,
-            artwork_b=artwork_b,
+            artwork_a=left.diagram_facts,
+            artwork_b=right.diagram_facts,
             movement=movement,
         )
         return diagram
@@ -325,18 +408,17 @@ def _generate_diagram(
         return build_fallback_diagram(artwork_a_label, artwork_b_label)
 
 
-def _run_compare_job(compare_id: str, set_name: str, left_id: str, right_id: str) -> None:
+async def _run_compare_job(compare_id: str, set_name: str, left_id: str, right_id: str) -> None:
     left = _get_painting_by_id(set_name, left_id)
     right = _get_painting_by_id(set_name, right_id)
 
     client = _get_openai_client()
+    job = _jobs[compare_id]
 
-    summary = _generate_summary(client, left, right)
+    summary = await _generate_summary(client, left, right)
     logger.info("Summary generated for %s vs %s", left.id, right.id)
-    with _jobs_lock:
-        job = _jobs[compare_id]
-        job.summary_markdown = summary
-        job.status = "summary_ready"
+    job.summary_markdown = summary
+    job.status = "summary_ready"
 
     diagram = _generate_diagram(client, left, right, summary)
     logger.info(
@@ -346,10 +428,8 @@ def _run_compare_job(compare_id: str, set_name: str, left_id: str, right_id: str
         len(diagram.nodes),
         len(diagram.edges),
     )
-    with _jobs_lock:
-        job = _jobs[compare_id]
-        job.diagram = diagram
-        job.status = "done"
+    job.diagram = diagram
+    job.status = "done"
 
     cache_name = _cache_key(set_name, left_id, right_id)
     cache_path = CACHE_DIR / cache_name
@@ -360,11 +440,14 @@ def _run_compare_job(compare_id: str, set_name: str, left_id: str, right_id: str
             "diagram": diagram.model_dump(),
         },
     )
+    _mem_cache_put(cache_name, (summary, diagram))
 
 
 @app.on_event("startup")
 def startup_event() -> None:
     _load_paintings()
+    if os.getenv("OPENAI_API_KEY") and AsyncOpenAI is not None:
+        _get_openai_client()
 
 
 @app.get("/api/sets", response_model=List[str])
@@ -372,12 +455,11 @@ def list_sets() -> List[str]:
     return sorted(ALLOWED_SETS)
 
 
-@app.get("/api/paintings")
-def list_paintings(set: str) -> List[Dict[str, Any]]:
+@app.get("/api/paintings", response_model=List[Dict[str, Any]])
+def list_paintings(set: str) -> Response:
     if set not in ALLOWED_SETS:
         raise HTTPException(status_code=400, detail="Set must be A or B.")
-    with _paintings_lock:
-        return [painting.as_payload() for painting in _paintings_by_set[set]]
+    return Response(content=_paintings_json_by_set[set], media_type="application/json")
 
 
 @app.post("/api/compare/start", response_model=CompareStartResponse)
@@ -392,26 +474,19 @@ def start_compare(
     left = _get_painting_by_id(payload.set, payload.left_id)
     right = _get_painting_by_id(payload.set, payload.right_id)
 
-    sorted_ids = sorted([left.id, right.id])
-    cache_name = _cache_key(payload.set, sorted_ids[0], sorted_ids[1])
-    cache_path = CACHE_DIR / cache_name
-    cached_payload = _read_cache(cache_path)
+    id_lo, id_hi = sorted((left.id, right.id))
+    cache_name = _cache_key(payload.set, id_lo, id_hi)
+    cached = _load_cached_compare(cache_name)
 
     compare_id = str(uuid.uuid4())
     job = CompareJob(compare_id)
 
-    if cached_payload:
-        cached_diagram = cached_payload.get("diagram")
-        if cached_diagram:
-            try:
-                job.summary_markdown = cached_payload.get("summary_markdown")
-                job.diagram = DiagramPayload.model_validate(cached_diagram)
-                job.status = "done"
-                with _jobs_lock:
-                    _jobs[compare_id] = job
-                return CompareStartResponse(compare_id=compare_id)
-            except (ValidationError, ValueError) as exc:
-                logger.warning("Cached diagram invalid, regenerating: %s", exc)
+    if cached is not None:
+        job.summary_markdown, job.diagram = cached
+        job.status = "done"
+        with _jobs_lock:
+            _jobs[compare_id] = job
+        return CompareStartResponse(compare_id=compare_id)
 
     with _jobs_lock:
         _jobs[compare_id] = job
@@ -420,16 +495,16 @@ def start_compare(
         _run_compare_job,
         compare_id,
         payload.set,
-        sorted_ids[0],
-        sorted_ids[1],
+        id_lo,
+        id_hi,
     )
     return CompareStartResponse(compare_id=compare_id)
 
 
 @app.get("/api/compare/{compare_id}", response_model=CompareStatusResponse)
-def get_compare_status(compare_id: str) -> CompareStatusResponse:
-    with _jobs_lock:
-        job = _jobs.get(compare_id)
-        if not job:
-            raise HTTPException(status_code=404, detail="Compare job not found.")
-        return job.as_response()
+def get_compare_status(compare_id: str) -> Response:
+    job = _jobs.get(compare_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Compare job not found.")
+    status = job.as_response()
+    return Response(content=status.model_dump_json(), media_type="application/json")
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from data_store import (
+    build_painting_options,
+    build_title_index,
+    get_two_paintings_by_title,
+    list_titles,
+    row_to_meta,
+)
+
+
+def _frame():
+    return pd.DataFrame(
+        {
+            "Title": ["  Water Lilies ", "The Bridge", np.nan, "Water Lilies", "Dancers"],
+            "Year": [1899, 1872, 1880, 1900, 1874],
+        }
+    )
+
+
+def test_build_title_index_strips_and_keeps_first_duplicate():
+    index = build_title_index(_frame(), "Title")
+    assert index["Water Lilies"] == 0
+    assert index["The Bridge"] == 1
+    assert index["nan"] == 2
+    assert index["Dancers"] == 4
+    assert len(index) == 4
+
+
+def test_get_two_paintings_by_title_with_and_without_index():
+    df = _frame()
+    a_meta, b_meta = get_two_paintings_by_title(df, "Title", "Water Lilies", "Dancers")
+    assert a_meta == {"Title": "  Water Lilies ", "Year": 1899}
+    assert b_meta["Year"] == 1874
+
+    index = build_title_index(df, "Title")
+    assert get_two_paintings_by_title(
+        df, "Title", "The Bridge", "Dancers", title_index=index
+    ) == (row_to_meta(df.iloc[1]), row_to_meta(df.iloc[4]))
+
+
+def test_row_to_meta_converts_numpy_scalars_and_drops_blanks():
+    row = pd.Series(
+        {
+            "Title": "Dancers",
+            "Year": np.int64(1874),
+            "Width": np.float64(75.5),
+            "Framed": np.bool_(True),
+            "Notes": "",
+            "Owner": np.nan,
+            "Acquired": pd.Timestamp("1920-01-02"),
+        }
+    )
+    meta = row_to_meta(row)
+    assert meta == {
+        "Title": "Dancers",
+        "Year": 1874,
+        "Width": 75.5,
+        "Framed": True,
+        "Acquired": "1920-01-02T00:00:00",
+    }
+    assert type(meta["Year"]) is int
+    assert type(meta["Width"]) is float
+    assert type(meta["Framed"]) is bool
+
+
+def test_list_titles_strips_and_dedupes():
+    df = pd.DataFrame({"Title": [" A ", "B", None, "A", "", "none", "NaN"]})
+    assert list_titles(df, "Title") == ["A", "B"]
+
+
+def test_build_painting_options_flags_missing_images(tmp_path):
+    (tmp_path / "water-lilies.jpg").write_bytes(b"")
+    df = pd.DataFrame({"Title": ["Water Lilies", "The Bridge"]})
+    options = build_painting_options(df, "Title", str(tmp_path))
+    assert options[0]["image_exists"] is True
+    assert options[0]["image_path"] == str(tmp_path / "water-lilies.jpg")
+    assert options[1]["image_exists"] is False
+    assert options[1]["image_path"] == f"{tmp_path}/the-bridge.jpg"
@@ -59,3 +59,52 @@ def test_build_fallback_diagram():
     assert "artworkA" in node_ids
     assert "artworkB" in node_ids
     assert "L1" in node_ids
+
+
+def test_parse_diagram_payload_ignores_trailing_braces():
+    raw = """```json
+    {
+      "nodes": [
+        {"id": "artworkA", "type": "artwork", "label": "Artwork A — {A}", "level": 0},
+        {"id": "artworkB", "type": "artwork", "label": "Artwork B — B", "level": 0},
+        {"id": "L1", "type": "niche_connection", "label": "Shared } motif", "level": 1}
+      ],
+      "edges": [
+        {"id": "edge-1", "source": "artworkA", "target": "L1", "kind": "direct"},
+        {"id": "edge-2", "source": "artworkB", "target": "L1", "kind": "direct"}
+      ]
+    }
+    ```
+    Note: placeholders like {title} were filled in.
+    """
+    diagram = parse_diagram_payload(raw)
+    assert diagram.nodes[0].label == "Artwork A — {A}"
+    assert diagram.nodes[2].label == "Shared } motif"
+
+
+def test_parse_diagram_payload_rejects_oversized_output():
+    raw = '{"nodes": [], "edges": []}' + " " * (512 * 1024)
+    with pytest.raises(ValueError, match="too large"):
+        parse_diagram_payload(raw)
+
+
+def test_parse_diagram_payload_self_loop_counts_once():
+    raw = """
+    {
+      "nodes": [
+        {"id": "artworkA", "type": "artwork", "label": "Artwork A — Test A", "level": 0},
+        {"id": "artworkB", "type": "artwork", "label": "Artwork B — Test B", "level": 0},
+        {"id": "x", "type": "theme", "label": "Shared harbour", "level": 2},
+        {"id": "y", "type": "theme", "label": "Loose brushwork", "level": 2}
+      ],
+      "edges": [
+        {"id": "edge-1", "source": "artworkA", "target": "x", "kind": "direct"},
+        {"id": "edge-2", "source": "artworkB", "target": "x", "kind": "direct"},
+        {"id": "edge-3", "source": "y", "target": "y", "kind": "contextual"},
+        {"id": "edge-4", "source": "artworkB", "target": "y", "kind": "contextual"}
+      ]
+    }
+    """
+    diagram = parse_diagram_payload(raw)
+    level_one = [node.id for node in diagram.nodes if node.type == "niche_connection"]
+    assert level_one == ["x"]
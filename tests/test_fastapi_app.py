@@ -0,0 +1,121 @@
+import importlib.util
+
+import pytest
+from fastapi.testclient import TestClient
+
+import fastapi_app
+
+
+class _FakeResponse:
+    output_text = (
+        "**Overview**\n- Artwork A\n- Artwork B\n\n"
+        "**Comparison Summary**\nBoth artworks belong to Impressionism."
+    )
+
+
+class _FakeResponses:
+    def __init__(self):
+        self.calls = 0
+        self.statuses = []
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.statuses.append([job.status for job in fastapi_app._jobs.values()])
+        return _FakeResponse()
+
+
+class _FakeClient:
+    def __init__(self):
+        self.responses = _FakeResponses()
+
+
+@pytest.fixture
+def openai_client(monkeypatch, tmp_path):
+    client = _FakeClient()
+    monkeypatch.setattr(fastapi_app, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(fastapi_app, "_get_openai_client", lambda: client)
+    fastapi_app._mem_cache.clear()
+    yield client
+    fastapi_app._mem_cache.clear()
+
+
+@pytest.fixture
+def api(openai_client):
+    with TestClient(fastapi_app.app) as client:
+        yield client
+
+
+def _start(api, left_id, right_id):
+    response = api.post(
+        "/api/compare/start", json={"set": "A", "left_id": left_id, "right_id": right_id}
+    )
+    assert response.status_code == 200
+    return api.get(f"/api/compare/{response.json()['compare_id']}").json()
+
+
+def test_compare_job_runs_to_done_and_writes_cache(api, openai_client, tmp_path):
+    paintings = api.get("/api/paintings?set=A").json()
+    left_id, right_id = paintings[1]["id"], paintings[0]["id"]
+
+    status = _start(api, left_id, right_id)
+
+    assert openai_client.responses.statuses == [["processing"]]
+    assert status["status"] == "done"
+    assert status["summary_markdown"].startswith("**Overview**")
+    assert status["diagram"]["nodes"][0]["id"] == "artworkA"
+    id_lo, id_hi = sorted((left_id, right_id))
+    cache_files = [path.name for path in tmp_path.iterdir()]
+    assert len(cache_files) == 1
+    assert cache_files[0].startswith(f"A__{id_lo}__{id_hi}__")
+    assert cache_files[0].endswith(".json")
+
+
+def test_openai_concurrency_must_be_positive(monkeypatch):
+    monkeypatch.setenv("ARTWEAVE_OPENAI_CONCURRENCY", "0")
+    spec = importlib.util.spec_from_file_location("fastapi_app_env_check", fastapi_app.__file__)
+    module = importlib.util.module_from_spec(spec)
+    with pytest.raises(RuntimeError, match="ARTWEAVE_OPENAI_CONCURRENCY"):
+        spec.loader.exec_module(module)
+
+
+def test_repeat_compare_is_served_from_memory(api, openai_client, monkeypatch):
+    paintings = api.get("/api/paintings?set=A").json()
+    first = _start(api, paintings[0]["id"], paintings[1]["id"])
+
+    def fail_read(cache_path):
+        raise AssertionError("cache read from disk")
+
+    monkeypatch.setattr(fastapi_app, "_read_cache", fail_read)
+    second = _start(api, paintings[1]["id"], paintings[0]["id"])
+
+    assert second["status"] == "done"
+    assert second["diagram"] == first["diagram"]
+    assert openai_client.responses.calls == 1
+
+
+def test_mem_cache_evicts_least_recently_used(openai_client, monkeypatch):
+    monkeypatch.setattr(fastapi_app, "MEM_CACHE_SIZE", 2)
+    diagram = fastapi_app.build_fallback_diagram("Artwork A — A", "Artwork B — B")
+
+    fastapi_app._mem_cache_put("a.json", ("a", diagram))
+    fastapi_app._mem_cache_put("b.json", ("b", diagram))
+    assert fastapi_app._mem_cache_get("a.json") is not None
+    fastapi_app._mem_cache_put("c.json", ("c", diagram))
+
+    assert list(fastapi_app._mem_cache) == ["a.json", "c.json"]
+    assert fastapi_app._mem_cache_get("b.json") is None
+
+
+def test_invalid_cached_diagram_is_regenerated(api, openai_client, tmp_path, caplog):
+    paintings = api.get("/api/paintings?set=A").json()
+    id_lo, id_hi = sorted((paintings[0]["id"], paintings[1]["id"]))
+    cache_path = tmp_path / fastapi_app._cache_key("A", id_lo, id_hi)
+    cache_path.write_text('{"summary_markdown": "stale", "diagram": {"nodes": "broken"}}')
+
+    status = _start(api, id_lo, id_hi)
+
+    assert "Cached diagram invalid" in caplog.text
+    assert openai_client.responses.calls == 1
+    assert status["status"] == "done"
+    assert status["summary_markdown"] != "stale"
+    assert "broken" not in cache_path.read_text()